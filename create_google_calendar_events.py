@@ -1,12 +1,22 @@
 from googleapiclient.discovery import build
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
+from google.auth.exceptions import TransportError
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta
 from curses_calendar import curses_main as curses_calendar_main
 from curses_prompt import curses_main as curses_prompt_main
-from utils import is_consecutive_dates
+from curses_prompt import MAX_CALENDAR_NAME_LENGTH, MAX_EVENT_NAME_LENGTH
+from utils import date_runs, merge_runs
+from ics import IcsWriter, read_ics_date_runs
+from spool import API_ERRORS, NETWORK_ERRORS, append_to_spool, event_id, flush_spool
+import calendar
+import collections
 import curses
+import httplib2
 import pickle
+import sys
 import argparse
 import pathlib
 
@@ -16,6 +26,11 @@ SCRIPT_DIR = pathlib.Path.home().joinpath(".create_google_calendar_events")
 SCRIPT_DIR.mkdir(parents=True, exist_ok=True)
 TOKEN_FILE = SCRIPT_DIR.joinpath("token.pickle")
 CREDENTIALS_FILE = SCRIPT_DIR.joinpath("credentials.json")
+SPOOL_FILE = SCRIPT_DIR.joinpath("spool.jsonl")
+# Tempo máximo, em segundos, de espera por uma resposta da API.
+HTTP_TIMEOUT = 15
+MIN_YEAR = 1990
+MAX_YEAR = 2999
 
 
 def valid_month(value):
@@ -34,23 +49,74 @@ def valid_year(value):
     """Valida o valor do ano."""
     year_int = int(value)
 
-    if year_int < 1990 or year_int > 2999:
+    if year_int < MIN_YEAR or year_int > MAX_YEAR:
         raise argparse.ArgumentTypeError(
-            f"{value} não é um ano válido. Deve estar entre 1990 e 2999."
+            f"{value} não é um ano válido. Deve estar entre {MIN_YEAR} e {MAX_YEAR}."
         )
 
     return year_int
 
 
-def length_limited(limit, argname):
-    def checker(value):
+def validate_names(event_name, calendar_name):
+    """Valida os nomes do evento e da agenda, retornando a lista de erros."""
+    errors = []
+
+    for argname, value, limit in (
+        ("name", event_name, MAX_EVENT_NAME_LENGTH),
+        ("calendar", calendar_name, MAX_CALENDAR_NAME_LENGTH),
+    ):
         if len(value) > limit:
-            raise argparse.ArgumentTypeError(
+            errors.append(
                 f"O argumento `{argname}` deve ter no máximo {limit} caracteres."
             )
-        return value
 
-    return checker
+    return errors
+
+
+def validate_days(year, month, days):
+    """Valida os dias do mês informados, retornando a lista de erros."""
+    errors = []
+    month_length = calendar.monthrange(year, month)[1]
+
+    for day in days:
+        if day < 1 or day > month_length:
+            errors.append(
+                f"{day} não é um dia válido em {month:02d}/{year}. Deve estar entre 1 e {month_length}."
+            )
+
+    for day, count in sorted(collections.Counter(days).items()):
+        if count > 1:
+            errors.append(f"O dia {day} foi informado {count} vezes.")
+
+    return errors
+
+
+def validate_runs(runs):
+    """Valida os limites de ano de intervalos de datas (início, fim inclusivo),
+    retornando a lista de erros."""
+    errors = []
+
+    for start_date, end_date in runs:
+        if int(start_date[:4]) < MIN_YEAR or int(end_date[:4]) > MAX_YEAR:
+            errors.append(
+                f"O intervalo {start_date} a {end_date} deve estar entre {MIN_YEAR} e {MAX_YEAR}."
+            )
+
+    return errors
+
+
+def report_errors(errors):
+    """Exibe os erros de validação. Retorna `True` caso existam erros."""
+    if not errors:
+        return False
+
+    print("O trabalho não foi iniciado devido aos seguintes erros:")
+
+    for error in errors:
+        print(f"  - {error}")
+
+    print("Corrija os erros e tente novamente.")
+    return True
 
 
 def parse_args():
@@ -90,7 +156,6 @@ def parse_args():
     parser.add_argument(
         "-n",
         "--name",
-        type=length_limited(37, "name"),
         default="",
         help="Nome dos eventos. Caso não seja informado, um prompt em curses será exibido para digitar o nome desejado.",
     )
@@ -98,17 +163,42 @@ def parse_args():
     parser.add_argument(
         "-c",
         "--calendar",
-        type=length_limited(37, "calendar"),
         default="",
         help="Nome da agenda do Google Calendar na qual os eventos serão criados. Caso não seja informado, um prompt em curses será exibido para digitar o calendário desejado.",
     )
 
-    parser.add_argument(
+    mode = parser.add_mutually_exclusive_group()
+
+    mode.add_argument(
         "--dry-run",
         action="store_true",
         help="Exibe os eventos que seriam criados, sem realmente criá-los no Google Calendar.",
     )
 
+    mode.add_argument(
+        "--spool",
+        action="store_true",
+        help=f"Caso a API do Google Calendar esteja inacessível, salva os eventos em uma fila local ({SPOOL_FILE}) para envio posterior com --flush.",
+    )
+
+    mode.add_argument(
+        "--flush",
+        action="store_true",
+        help="Envia ao Google Calendar os eventos salvos na fila local e encerra.",
+    )
+
+    mode.add_argument(
+        "--export-ics",
+        metavar="FILE",
+        help="Escreve os eventos em um arquivo .ics (RFC 5545), para importação única no Google Calendar, ao invés de criá-los pela API.",
+    )
+
+    parser.add_argument(
+        "--import-ics",
+        metavar="FILE",
+        help="Usa as datas dos eventos de um arquivo .ics ao invés dos dias informados ou do widget de calendário.",
+    )
+
     return parser.parse_args()
 
 
@@ -123,8 +213,12 @@ def get_credentials_from_browser_login():
     return creds
 
 
-def get_credentials():
-    """Obtém credenciais do usuário."""
+def get_credentials(raise_network_errors=False):
+    """Obtém credenciais do usuário.
+
+    Com `raise_network_errors`, uma falha de rede no refresh do token é
+    propagada, mantendo o token.pickle, ao invés de iniciar uma nova autenticação.
+    """
     creds = None
 
     if TOKEN_FILE.exists():
@@ -137,7 +231,11 @@ def get_credentials():
     if creds and creds.expired and creds.refresh_token:
         try:
             creds.refresh(Request())
+            return creds
         except Exception as e:
+            if raise_network_errors and isinstance(e, TransportError):
+                raise
+
             print("Erro no refresh do token de acesso.")
             print("Excluíndo token.pickle para nova autenticação.")
             TOKEN_FILE.unlink(missing_ok=True)
@@ -145,6 +243,12 @@ def get_credentials():
     return get_credentials_from_browser_login()
 
 
+def build_service(creds):
+    """Cria o serviço da API do Google Calendar com tempo limite de resposta."""
+    http = AuthorizedHttp(creds, http=httplib2.Http(timeout=HTTP_TIMEOUT))
+    return build("calendar", "v3", http=http)
+
+
 def get_calendar_id(service, calendar_name):
     """Obtém o id de uma agenda pelo nome."""
     page_token = None
@@ -164,17 +268,19 @@ def get_calendar_id(service, calendar_name):
     return None
 
 
-def create_event(event_name, start_date, end_date, service, calendar_id):
+def build_event_body(event_name, start_date, end_date):
     end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
     end_date_obj += timedelta(days=1)
     end_date_api = end_date_obj.strftime("%Y-%m-%d")
 
-    event_body = {
+    return {
         "summary": event_name,
         "start": {"date": start_date},
         "end": {"date": end_date_api},
     }
 
+
+def insert_event(event_body, service, calendar_id):
     event = service.events().insert(calendarId=calendar_id, body=event_body).execute()
 
     print("Evento criado:")
@@ -185,6 +291,69 @@ def create_event(event_name, start_date, end_date, service, calendar_id):
     print()
 
 
+def create_event(event_name, start_date, end_date, service, calendar_id):
+    event_body = build_event_body(event_name, start_date, end_date)
+    insert_event(event_body, service, calendar_id)
+
+
+def spooling(calendar_name):
+    """Cria eventos como `create_event`, mas salva na fila local os que não
+    puderem ser enviados por falta de conexão."""
+
+    offline = False
+
+    def spool_create_event(event_name, start_date, end_date, service, calendar_id):
+        nonlocal offline
+        event_body = build_event_body(event_name, start_date, end_date)
+        event_body["id"] = event_id(calendar_name, event_body)
+
+        if service is None or calendar_id is None:
+            offline = True
+
+        if not offline:
+            try:
+                insert_event(event_body, service, calendar_id)
+                return
+            except HttpError as e:
+                if e.resp.status != 409:
+                    raise
+
+                print("Evento já existente:")
+                print(f"  Nome: {event_name}")
+                print(f"  Data de Início: {start_date}")
+                print()
+                return
+            except API_ERRORS:
+                print("Google Calendar inacessível. Os eventos restantes serão salvos na fila local.")
+                print()
+                offline = True
+
+        append_to_spool(SPOOL_FILE, calendar_name, event_body)
+
+        print("Evento salvo na fila local:")
+        print(f"  Nome: {event_name}")
+        print(f"  Data de Início: {start_date}")
+        print(f"  Data de Fim (Exclusiva): {event_body['end']['date']}")
+        print()
+
+    return spool_create_event
+
+
+def exporting(ics_writer):
+    """Escreve eventos em um arquivo .ics ao invés de criá-los pela API."""
+
+    def export_ics_create_event(event_name, start_date, end_date, service, calendar_id):
+        ics_writer.write_event(event_name, start_date, end_date)
+
+        print("Evento exportado:")
+        print(f"  Nome: {event_name}")
+        print(f"  Data de Início: {start_date}")
+        print(f"  Data de Fim (Inclusiva): {end_date}")
+        print()
+
+    return export_ics_create_event
+
+
 def dry_run_create_event(event_name, start_date, end_date, service, calendar_id):
     end_date_obj = datetime.strptime(end_date, "%Y-%m-%d")
     end_date_obj += timedelta(days=1)
@@ -197,68 +366,147 @@ def dry_run_create_event(event_name, start_date, end_date, service, calendar_id)
     print()
 
 
+def flush():
+    """Envia ao Google Calendar os eventos salvos na fila local."""
+    try:
+        creds = get_credentials(raise_network_errors=True)
+        service = build_service(creds)
+        sent, pending = flush_spool(SPOOL_FILE, service, get_calendar_id)
+    except NETWORK_ERRORS:
+        print("Google Calendar inacessível. Os eventos permanecem na fila local.")
+        print("Tente novamente com --flush quando a conexão voltar.")
+        return
+
+    print(f"{sent} evento(s) enviado(s) da fila local.")
+
+    if pending:
+        print(f"{pending} evento(s) permanecem na fila. Tente novamente com --flush.")
+
+
+def connect(calendar_name, spool):
+    """Autentica o usuário e obtém o serviço da API e o id da agenda.
+
+    No modo de fila local, erros de rede não interrompem a execução: o serviço
+    e o id da agenda são retornados como `None`.
+    """
+    try:
+        creds = get_credentials(raise_network_errors=spool)
+        service = build_service(creds)
+    except NETWORK_ERRORS:
+        if not spool:
+            raise
+
+        return offline()
+
+    try:
+        return service, get_calendar_id(service, calendar_name)
+    except API_ERRORS:
+        if not spool:
+            raise
+
+        return offline()
+
+
+def offline():
+    """Informa que os eventos serão salvos na fila local."""
+    print("Google Calendar inacessível. Os eventos serão salvos na fila local.")
+    print()
+    return None, None
+
+
+def create_events(event_name, runs, creation_strategy, service, calendar_id):
+    """Aplica a estratégia de criação a cada intervalo de dias consecutivos."""
+    for start_date, end_date in runs:
+        creation_strategy(event_name, start_date, end_date, service, calendar_id)
+
+
 def main():
     """Cria eventos de dia inteiro no Google Calendar em uma agenda específica."""
     args = parse_args()
+
+    if args.flush:
+        flush()
+        return
+
     event_name = args.name
     calendar_name = args.calendar
+    errors = validate_days(args.year, args.month, args.days)
+    errors += validate_names(event_name, calendar_name)
 
-    creds = get_credentials()
-    service = build("calendar", "v3", credentials=creds)
+    if args.import_ics:
+        try:
+            imported_runs = list(read_ics_date_runs(args.import_ics))
+            errors += validate_runs(imported_runs)
+            runs = merge_runs(imported_runs)
+        except (OSError, ValueError) as e:
+            errors.append(f"Erro ao ler `{args.import_ics}`: {e}")
+
+    if report_errors(errors):
+        sys.exit(1)
+
+    required = (event_name,) if args.export_ics else (event_name, calendar_name)
 
-    if "" in (event_name, calendar_name):
+    if "" in required:
         event_name, calendar_name = curses.wrapper(
-            curses_prompt_main, event_name, calendar_name
+            curses_prompt_main,
+            event_name,
+            calendar_name,
+            ask_calendar=not args.export_ics,
         )
+        required = (event_name,) if args.export_ics else (event_name, calendar_name)
+
+    if "" in required:
+        if args.export_ics:
+            print("Nome do evento é obrigatório.")
+        else:
+            print("Nome do evento e nome da agenda são obrigatórios.")
 
-    if "" in (event_name, calendar_name):
-        print("Nome do evento e nome da agenda são obrigatórios.")
         print("Tente novamente.")
         return
 
-    days = args.days
-    dates = sorted(f"{args.year}-{args.month:02d}-{day:02d}" for day in days)
+    if not args.import_ics:
+        days = args.days
+        dates = sorted(f"{args.year}-{args.month:02d}-{day:02d}" for day in days)
 
-    if len(dates) == 0:
-        dates = curses.wrapper(
-            curses_calendar_main,
-            init_year=args.year,
-            init_month=args.month,
-        )
+        if len(dates) == 0:
+            dates = curses.wrapper(
+                curses_calendar_main,
+                init_year=args.year,
+                init_month=args.month,
+            )
 
-    if len(dates) == 0:
-        print("Nenhum dia foi selecionado.")
-        print("Tente novamente.")
+        if len(dates) == 0:
+            print("Nenhum dia foi selecionado.")
+            print("Tente novamente.")
+            return
+
+        if report_errors(validate_runs(date_runs(dates))):
+            sys.exit(1)
+
+        runs = date_runs(dates)
+
+    if args.export_ics:
+        with IcsWriter(args.export_ics) as ics_writer:
+            create_events(event_name, runs, exporting(ics_writer), None, None)
+
+        print(f"Eventos exportados para `{args.export_ics}`.")
         return
 
-    calendar_id = get_calendar_id(service, calendar_name)
+    service, calendar_id = connect(calendar_name, args.spool)
 
-    if not calendar_id:
+    if not calendar_id and not (args.spool and service is None):
         print(f"Agenda `{calendar_name}` não encontrada.")
         print("Cheque as agendas existentes no Google Calendar e tente novamente.")
         return
 
-    creation_strategy = dry_run_create_event if args.dry_run else create_event
-    start_date_index = 0
-    end_date_index = 0
-
-    while start_date_index < len(dates):
-        if end_date_index + 1 != len(dates) and is_consecutive_dates(
-            dates[end_date_index], dates[end_date_index + 1]
-        ):
-            end_date_index += 1
-            continue
-
-        creation_strategy(
-            event_name,
-            dates[start_date_index],
-            dates[end_date_index],
-            service,
-            calendar_id,
-        )
+    if args.dry_run:
+        creation_strategy = dry_run_create_event
+    elif args.spool:
+        creation_strategy = spooling(calendar_name)
+    else:
+        creation_strategy = create_event
 
-        end_date_index += 1
-        start_date_index = end_date_index
+    create_events(event_name, runs, creation_strategy, service, calendar_id)
 
 
 if __name__ == "__main__":
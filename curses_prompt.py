@@ -2,6 +2,9 @@ import curses
 from enum import IntEnum
 from dataclasses import dataclass
 
+MAX_EVENT_NAME_LENGTH = 40
+MAX_CALENDAR_NAME_LENGTH = 37
+
 
 @dataclass
 class PromptField:
@@ -25,15 +28,18 @@ class CursesPrompt:
     PROMPT_START_Y = 1
     PROMPT_START_X = 1
 
-    def __init__(self, event_name: str, calendar_name: str):
+    def __init__(
+        self, event_name: str, calendar_name: str, ask_calendar: bool = True
+    ):
         self.current_field = 0
+        self.calendar_name = calendar_name
         self.fields = [
             PromptField(
                 label="Event Name:",
                 value=event_name,
                 y=2,
                 x=2,
-                maxlen=40,
+                maxlen=MAX_EVENT_NAME_LENGTH,
                 is_error=False,
             ),
             PromptField(
@@ -41,11 +47,14 @@ class CursesPrompt:
                 value=calendar_name,
                 y=4,
                 x=2,
-                maxlen=37,
+                maxlen=MAX_CALENDAR_NAME_LENGTH,
                 is_error=False,
             ),
         ]
 
+        if not ask_calendar:
+            self.fields.pop()
+
         self.window = curses.newwin(
             self.PROMPT_HEIGHT,
             self.PROMPT_WIDTH,
@@ -103,7 +112,9 @@ class CursesPrompt:
         if all(field.value.strip() for field in self.fields):
             return (
                 self.fields[0].value.strip(),
-                self.fields[1].value.strip(),
+                self.fields[1].value.strip()
+                if len(self.fields) > 1
+                else self.calendar_name,
             )
 
         for field in self.fields:
@@ -153,6 +164,7 @@ def curses_main(
     stdscr: curses.window,
     event_name: str = "",
     calendar_name: str = "",
+    ask_calendar: bool = True,
 ) -> tuple[str, str]:
-    curses_prompt = CursesPrompt(event_name, calendar_name)
+    curses_prompt = CursesPrompt(event_name, calendar_name, ask_calendar)
     return curses_prompt.curses_main()
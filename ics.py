@@ -0,0 +1,337 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import hashlib
+import os
+
+PRODID = "-//create_google_calendar_events//PT-BR"
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(value):
+    """Escapa um valor do tipo TEXT conforme a RFC 5545."""
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def fold_line(line):
+    """Quebra uma linha de conteúdo em linhas de no máximo 75 octetos."""
+    encoded = line.encode("utf-8")
+
+    if len(encoded) <= MAX_LINE_OCTETS:
+        yield line
+        return
+
+    chunk = ""
+
+    for char in line:
+        if len((chunk + char).encode("utf-8")) > MAX_LINE_OCTETS:
+            yield chunk
+            chunk = " "
+
+        chunk += char
+
+    yield chunk
+
+
+def event_lines(event_name, start_date, end_date, dtstamp):
+    """Gera as linhas de um VEVENT de dia inteiro, com data de fim inclusiva."""
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    uid_key = f"{event_name}\0{start_date}\0{end_date}".encode("utf-8")
+    uid = hashlib.sha256(uid_key).hexdigest()[:32]
+
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid}@create_google_calendar_events"
+    yield f"DTSTAMP:{dtstamp}"
+    yield f"DTSTART;VALUE=DATE:{start_dt:%Y%m%d}"
+    yield f"DTEND;VALUE=DATE:{end_dt:%Y%m%d}"
+    yield f"SUMMARY:{escape_text(event_name)}"
+    yield "END:VEVENT"
+
+
+class IcsWriter:
+    """Escreve eventos em um arquivo .ics à medida que são recebidos.
+
+    Os eventos são escritos em um arquivo temporário, que só substitui o destino
+    caso a escrita termine sem erros, evitando exportações truncadas.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.file = None
+        self.dtstamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+    def __enter__(self):
+        self.file = open(self.tmp_path, "w", encoding="utf-8", newline="")
+        self._write_lines(
+            ("BEGIN:VCALENDAR", "VERSION:2.0", f"PRODID:{PRODID}", "CALSCALE:GREGORIAN")
+        )
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.file.close()
+            os.unlink(self.tmp_path)
+            return
+
+        self._write_lines(("END:VCALENDAR",))
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def _write_lines(self, lines):
+        for line in lines:
+            for folded in fold_line(line):
+                self.file.write(folded + "\r\n")
+
+    def write_event(self, event_name, start_date, end_date):
+        self._write_lines(event_lines(event_name, start_date, end_date, self.dtstamp))
+
+
+def unfolded_lines(file):
+    """Gera as linhas de conteúdo de um arquivo .ics, desfazendo as quebras."""
+    current = None
+
+    for raw_line in file:
+        line = raw_line.rstrip("\r\n")
+
+        if line[:1] in (" ", "\t"):
+            if current is not None:
+                current += line[1:]
+            continue
+
+        if current is not None:
+            yield current
+
+        current = line
+
+    if current is not None:
+        yield current
+
+
+def parse_property(line):
+    """Separa uma linha de conteúdo em nome, parâmetros e valor."""
+    name_and_params, _, value = line.partition(":")
+    name, *raw_params = name_and_params.split(";")
+    params = {}
+
+    for raw_param in raw_params:
+        param_name, _, param_value = raw_param.partition("=")
+        params[param_name.upper()] = param_value.strip('"')
+
+    return name.upper(), params, value
+
+
+def parse_ics_date(value, tzid=None):
+    """Converte um valor DATE ou DATE-TIME da RFC 5545 na data local, como `datetime`.
+
+    Horários em UTC (sufixo `Z`) ou com TZID são convertidos para o fuso local
+    antes de se obter a data. Horários sem fuso são considerados locais.
+    """
+    if "T" not in value:
+        return datetime.strptime(value[:8], "%Y%m%d")
+
+    dt = datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+
+    if value.endswith("Z"):
+        dt = dt.replace(tzinfo=timezone.utc)
+    elif tzid:
+        try:
+            dt = dt.replace(tzinfo=ZoneInfo(tzid))
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"TZID desconhecido: {tzid}")
+
+    if dt.tzinfo is not None:
+        dt = dt.astimezone()
+
+    return datetime(dt.year, dt.month, dt.day)
+
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+
+def expand_rrule(start_dt, rrule):
+    """Gera as ocorrências de uma RRULE simples (FREQ=DAILY|WEEKLY com COUNT ou UNTIL).
+
+    Regras com outras partes, ou sem fim, levantam `ValueError`, para que nenhuma
+    ocorrência seja descartada silenciosamente.
+    """
+    parts = dict(part.split("=", 1) for part in rrule.upper().split(";") if part)
+    freq = parts.pop("FREQ", None)
+    interval = int(parts.pop("INTERVAL", "1"))
+    count = parts.pop("COUNT", None)
+    until = parts.pop("UNTIL", None)
+    byday = parts.pop("BYDAY", None)
+    parts.pop("WKST", None)
+
+    if freq not in ("DAILY", "WEEKLY"):
+        raise ValueError(f"RRULE não suportada: {rrule}")
+
+    if byday is not None and not (
+        freq == "WEEKLY" and byday == WEEKDAYS[start_dt.weekday()]
+    ):
+        raise ValueError(f"RRULE não suportada: {rrule}")
+
+    if parts:
+        raise ValueError(f"RRULE não suportada: {rrule}")
+
+    if count is None and until is None:
+        raise ValueError(f"RRULE sem COUNT ou UNTIL não é suportada: {rrule}")
+
+    step = timedelta(days=interval * (7 if freq == "WEEKLY" else 1))
+    until_dt = parse_ics_date(until) if until is not None else None
+    occurrence = start_dt
+    occurrences = 0
+
+    while (count is None or occurrences < int(count)) and (
+        until_dt is None or occurrence <= until_dt
+    ):
+        yield occurrence
+        occurrences += 1
+        occurrence += step
+
+
+def parse_ics_date_list(value, tzid=None):
+    """Converte uma lista de valores DATE ou DATE-TIME separados por vírgulas."""
+    return [parse_ics_date(item, tzid) for item in value.split(",") if item]
+
+
+@dataclass
+class IcsEvent:
+    uid: str = ""
+    status: str = ""
+    recurrence_id: datetime | None = None
+    start: datetime | None = None
+    end: datetime | None = None
+    duration: timedelta | None = None
+    rrules: list[str] = field(default_factory=list)
+    rdates: list[datetime] = field(default_factory=list)
+    exdates: set[datetime] = field(default_factory=set)
+
+
+def event_date_runs(event, exdates):
+    """Gera os intervalos de datas (início, fim inclusivo) das ocorrências de um VEVENT."""
+    start_dt = event.start
+    end_dt = event.end
+
+    if end_dt is None and event.duration is not None:
+        end_dt = start_dt + event.duration
+
+    if end_dt is None or end_dt <= start_dt:
+        end_dt = start_dt + timedelta(days=1)
+
+    if len(event.rrules) > 1:
+        raise ValueError("Eventos com mais de uma RRULE não são suportados.")
+
+    duration = end_dt - start_dt
+    occurrences = (
+        list(expand_rrule(start_dt, event.rrules[0])) if event.rrules else [start_dt]
+    ) + event.rdates
+
+    for occurrence in sorted(set(occurrences)):
+        if occurrence in exdates:
+            continue
+
+        yield (
+            occurrence.strftime("%Y-%m-%d"),
+            (occurrence + duration - timedelta(days=1)).strftime("%Y-%m-%d"),
+        )
+
+
+def read_ics_events(path):
+    """Gera os VEVENTs de um arquivo .ics.
+
+    Apenas propriedades do próprio VEVENT são lidas; as de componentes aninhados,
+    como VALARM, são ignoradas.
+    """
+    with open(path, encoding="utf-8") as file:
+        components = []
+        event = None
+
+        for line in unfolded_lines(file):
+            name, params, value = parse_property(line)
+            tzid = params.get("TZID")
+
+            if name == "BEGIN":
+                components.append(value.upper())
+
+                if value.upper() == "VEVENT":
+                    event = IcsEvent()
+            elif name == "END":
+                component = components.pop() if components else None
+
+                if component == "VEVENT":
+                    yield event
+            elif not components or components[-1] != "VEVENT":
+                continue
+            elif name == "UID":
+                event.uid = value
+            elif name == "STATUS":
+                event.status = value.upper()
+            elif name == "RECURRENCE-ID":
+                event.recurrence_id = parse_ics_date(value, tzid)
+            elif name == "DTSTART":
+                event.start = parse_ics_date(value, tzid)
+            elif name == "DTEND":
+                event.end = parse_ics_date(value, tzid)
+            elif name == "DURATION":
+                event.duration = parse_ics_duration_days(value)
+            elif name == "RRULE":
+                event.rrules.append(value)
+            elif name == "RDATE":
+                event.rdates.extend(parse_ics_date_list(value, tzid))
+            elif name == "EXDATE":
+                event.exdates.update(parse_ics_date_list(value, tzid))
+
+
+def read_ics_date_runs(path):
+    """Gera os intervalos de datas (início, fim inclusivo) dos eventos de um .ics.
+
+    São considerados DTSTART, DTEND/DURATION, RRULE, RDATE e EXDATE de cada
+    VEVENT. Ocorrências alteradas (RECURRENCE-ID) substituem a ocorrência
+    original da série, e eventos com STATUS:CANCELLED são ignorados. Eventos sem
+    fim ocupam um único dia. Recorrências não suportadas levantam `ValueError`.
+
+    Como as alterações podem aparecer depois da série no arquivo, os eventos são
+    lidos por completo antes de gerar os intervalos.
+    """
+    events = list(read_ics_events(path))
+    overridden = {}
+
+    for event in events:
+        if event.recurrence_id is not None:
+            overridden.setdefault(event.uid, set()).add(event.recurrence_id)
+
+    for event in events:
+        if event.status == "CANCELLED" or event.start is None:
+            continue
+
+        exdates = event.exdates
+
+        if event.recurrence_id is None:
+            exdates = exdates | overridden.get(event.uid, set())
+
+        yield from event_date_runs(event, exdates)
+
+
+def parse_ics_duration_days(value):
+    """Converte uma DURATION da RFC 5545 (ex.: P3D, P1W) em um `timedelta` de dias."""
+    value = value.lstrip("+").upper()
+
+    if not value.startswith("P"):
+        return timedelta(days=1)
+
+    value = value[1:].split("T", 1)[0]
+
+    if value.endswith("W"):
+        return timedelta(weeks=int(value[:-1]))
+
+    if value.endswith("D"):
+        return timedelta(days=int(value[:-1]))
+
+    return timedelta(days=1)
@@ -0,0 +1,177 @@
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import pathlib
+import socket
+
+import httplib2
+from google.auth.exceptions import TransportError
+from googleapiclient.errors import HttpError
+
+# O Google Calendar aceita no máximo 50 requisições por lote.
+BATCH_SIZE = 50
+
+# Erros que indicam que a API está inacessível, e não que a requisição é inválida.
+NETWORK_ERRORS = (
+    httplib2.HttpLib2Error,
+    TransportError,
+    socket.timeout,
+    ConnectionError,
+)
+
+# Erros possíveis nas chamadas à API. O httplib2 deixa passar `OSError` (como
+# ENETUNREACH e EHOSTUNREACH, comuns quando a VPN cai) e `ssl.SSLError`. Devem
+# ser capturados apenas ao redor das chamadas à API, para não confundir uma
+# falha de rede com a falta do credentials.json ou do token.pickle.
+API_ERRORS = NETWORK_ERRORS + (OSError,)
+
+
+def event_id(calendar_name, event_body):
+    """Gera um id determinístico para o evento, tornando sua inserção idempotente.
+
+    O id é um hash hexadecimal, que está contido no alfabeto base32hex exigido
+    pela API do Google Calendar.
+    """
+    key = "\0".join(
+        (
+            calendar_name,
+            event_body["summary"],
+            event_body["start"]["date"],
+            event_body["end"]["date"],
+        )
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+
+
+@contextlib.contextmanager
+def spool_lock(spool_file):
+    """Bloqueia a fila local para uso exclusivo.
+
+    O bloqueio é feito em um arquivo separado, pois `write_spool` substitui o
+    arquivo da fila.
+    """
+    lock_file = pathlib.Path(spool_file).with_suffix(".lock")
+
+    with open(lock_file, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def append_to_spool(spool_file, calendar_name, event_body):
+    """Adiciona o corpo de um evento ao final da fila local."""
+    entry = {"calendar": calendar_name, "body": event_body}
+
+    with spool_lock(spool_file), open(spool_file, "a", encoding="utf-8") as spool:
+        spool.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        spool.flush()
+        os.fsync(spool.fileno())
+
+
+def read_spool(spool_file):
+    """Lê as entradas da fila local."""
+    spool_file = pathlib.Path(spool_file)
+
+    if not spool_file.exists():
+        return []
+
+    with open(spool_file, encoding="utf-8") as spool:
+        return [json.loads(line) for line in spool if line.strip()]
+
+
+def write_spool(spool_file, entries):
+    """Reescreve a fila local de forma atômica."""
+    spool_file = pathlib.Path(spool_file)
+
+    if not entries:
+        spool_file.unlink(missing_ok=True)
+        return
+
+    tmp_file = spool_file.with_suffix(".tmp")
+
+    with open(tmp_file, "w", encoding="utf-8") as spool:
+        for entry in entries:
+            spool.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        spool.flush()
+        os.fsync(spool.fileno())
+
+    os.replace(tmp_file, spool_file)
+
+
+def flush_spool(spool_file, service, get_calendar_id, batch_size=BATCH_SIZE):
+    """Envia em lotes os eventos da fila local para o Google Calendar.
+
+    Eventos enviados com sucesso, ou que já existiam (HTTP 409), são removidos
+    da fila. Os demais permanecem para uma nova tentativa. Retorna o número de
+    eventos enviados e o número de eventos que permaneceram na fila.
+
+    A fila permanece bloqueada durante todo o envio, de forma que execuções
+    concorrentes com --spool aguardam o fim do envio para adicionar eventos.
+    """
+    with spool_lock(spool_file):
+        return _flush_spool(spool_file, service, get_calendar_id, batch_size)
+
+
+def _flush_spool(spool_file, service, get_calendar_id, batch_size):
+    entries = read_spool(spool_file)
+    calendar_ids = {}
+    pending = []
+    sent = 0
+
+    for entry in entries:
+        calendar_name = entry["calendar"]
+
+        if calendar_name not in calendar_ids:
+            try:
+                calendar_ids[calendar_name] = get_calendar_id(service, calendar_name)
+            except API_ERRORS as e:
+                print(f"Erro de rede ao esvaziar a fila: {e}")
+                return 0, len(entries)
+
+        if not calendar_ids[calendar_name]:
+            print(f"Agenda `{calendar_name}` não encontrada. Mantendo evento na fila.")
+            pending.append(entry)
+
+    sendable = [entry for entry in entries if calendar_ids[entry["calendar"]]]
+
+    for batch_start in range(0, len(sendable), batch_size):
+        batch_entries = sendable[batch_start : batch_start + batch_size]
+        failed = set()
+
+        def callback(request_id, response, exception):
+            if exception is None:
+                return
+
+            if isinstance(exception, HttpError) and exception.resp.status == 409:
+                return
+
+            print(f"Erro ao enviar evento da fila: {exception}")
+            failed.add(int(request_id))
+
+        batch = service.new_batch_http_request(callback=callback)
+
+        for idx, entry in enumerate(batch_entries):
+            request = service.events().insert(
+                calendarId=calendar_ids[entry["calendar"]], body=entry["body"]
+            )
+            batch.add(request, request_id=str(idx))
+
+        try:
+            batch.execute()
+        except API_ERRORS as e:
+            print(f"Erro de rede ao esvaziar a fila: {e}")
+            pending.extend(sendable[batch_start:])
+            break
+
+        pending.extend(batch_entries[idx] for idx in sorted(failed))
+        sent += len(batch_entries) - len(failed)
+        write_spool(spool_file, pending + sendable[batch_start + batch_size :])
+
+    write_spool(spool_file, pending)
+    return sent, len(pending)
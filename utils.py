@@ -6,3 +6,37 @@ def is_consecutive_dates(start_date, end_date):
     end_dt = datetime.strptime(end_date, "%Y-%m-%d")
     delta = (end_dt - start_dt).days
     return delta == 1
+
+
+def date_runs(dates):
+    """Agrupa datas ordenadas em intervalos (início, fim inclusivo) de dias consecutivos."""
+    start_date_index = 0
+    end_date_index = 0
+
+    while start_date_index < len(dates):
+        if end_date_index + 1 != len(dates) and is_consecutive_dates(
+            dates[end_date_index], dates[end_date_index + 1]
+        ):
+            end_date_index += 1
+            continue
+
+        yield dates[start_date_index], dates[end_date_index]
+
+        end_date_index += 1
+        start_date_index = end_date_index
+
+
+def merge_runs(runs):
+    """Ordena intervalos (início, fim inclusivo) e une os que se sobrepõem ou são adjacentes."""
+    merged = []
+
+    for start_date, end_date in sorted(runs):
+        if merged and (
+            merged[-1][1] >= start_date or is_consecutive_dates(merged[-1][1], start_date)
+        ):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end_date))
+            continue
+
+        merged.append((start_date, end_date))
+
+    return merged